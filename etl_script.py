@@ -1,21 +1,62 @@
+import numpy as np
 import pandas as pd
 import psycopg2
 from psycopg2 import sql
+from psycopg2.errors import UniqueViolation
+from psycopg2.extensions import AsIs, Float, register_adapter
+from psycopg2.extras import execute_batch, execute_values
+from psycopg2.pool import ThreadedConnectionPool
 from dotenv import load_dotenv
 import os
+import io
+import math
+import csv
+import struct
 import logging
+from logging.handlers import MemoryHandler, QueueHandler, QueueListener
+import multiprocessing
+from multiprocessing.util import Finalize
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import chain, repeat
 from datetime import datetime
+from urllib.parse import quote
 
-# Set up logging
+# Optional Arrow engine: PyArrow parses the CSV and ADBC loads it with COPY
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pacsv
+    import adbc_driver_postgresql.dbapi as adbc_pg
+except ImportError:
+    pa = None
+
+# Set up logging; file records are buffered in memory and written in
+# batches, or straight away once an error is logged
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+file_handler = logging.FileHandler(
+    f'etl_log_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log', delay=True
+)
+# basicConfig only formats the handlers it is given, not the wrapped target
+file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
+    format=LOG_FORMAT,
     handlers=[
-        logging.FileHandler(f'etl_log_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log'),
+        MemoryHandler(capacity=1024, flushLevel=logging.ERROR, target=file_handler),
         logging.StreamHandler()
     ]
 )
 
+# Let psycopg2 adapt the scalars yielded by pandas' nullable integer columns
+for np_type in (np.int8, np.int16, np.int32, np.int64):
+    register_adapter(np_type, AsIs)
+register_adapter(type(pd.NA), lambda value: AsIs('NULL'))
+
+# Missing values of text and category columns come out of itertuples as
+# float NaN; send them as NULL, like COPY does, instead of 'NaN'::float
+register_adapter(float, lambda value: AsIs('NULL') if math.isnan(value) else Float(value))
+
 # Load environment variables
 load_dotenv()
 
@@ -28,23 +69,187 @@ DB_CONFIG = {
     'port': os.getenv('DB_PORT', '5432')
 }
 
-def get_connection(database='postgres'):
-    """Create database connection with error handling"""
+# Maximum number of pooled connections to the target database per process
+POOL_MAX_CONNECTIONS = 8
+
+# ETL engine: 'pandas' processes the CSV in chunks with pandas and psycopg2,
+# 'arrow' uses PyArrow and ADBC (requires pyarrow and adbc-driver-postgresql)
+ETL_ENGINE = os.getenv('ETL_ENGINE', 'pandas')
+
+# Load method: 'copy' streams rows with COPY, 'values' falls back to
+# multi-row INSERT statements built by execute_values and 'prepared' runs
+# a server-side prepared INSERT in batches of EXECUTE statements
+LOAD_METHOD = os.getenv('ETL_LOAD_METHOD', 'copy')
+
+# Number of rows sent per round trip by the 'values' and 'prepared' load
+# methods; shipments rows are small, so 10k rows keep each statement to a
+# few hundred kilobytes
+VALUES_PAGE_SIZE = 10_000
+
+# Number of CSV rows extracted, transformed and loaded at a time
+CHUNK_SIZE = 100_000
+
+# Number of worker processes transforming and loading chunks in parallel
+# with the pandas engine (1, the default, loads the chunks one after
+# another); capped since each worker holds its own database connection
+MAX_WORKERS = 8
+ETL_WORKERS = max(1, min(int(os.getenv('ETL_WORKERS', '1')), MAX_WORKERS))
+
+# Header of the source CSV; validate_header() checks it before the readers
+# replace it with COLS
+SOURCE_COLS = [
+    'ID', 'Warehouse_block', 'Mode_of_Shipment', 'Customer_care_calls',
+    'Customer_rating', 'Cost_of_the_Product', 'Prior_purchases',
+    'Product_importance', 'Gender', 'Discount_offered', 'Weight_in_gms',
+    'Reached.on.Time_Y.N'
+]
+
+# Column names of warehouse.shipments, in the order they appear in the CSV;
+# read_csv assigns them in place of the CSV header
+COLS = [
+    'id', 'warehouse_block', 'mode_of_shipment', 'customer_care_calls',
+    'customer_rating', 'cost_of_the_product', 'prior_purchases',
+    'product_importance', 'gender', 'discount_offered', 'weight_in_gms',
+    'reached_on_time'
+]
+
+# Column types used when parsing the CSV, sized to the values each column
+# holds (nullable integers keep missing values without coercion)
+DTYPES = {
+    'id': 'Int32',
+    'customer_care_calls': 'Int32',
+    'customer_rating': 'Int8',
+    'cost_of_the_product': 'Int32',
+    'prior_purchases': 'Int16',
+    'discount_offered': 'Int16',
+    'weight_in_gms': 'Int32',
+    'reached_on_time': 'Int8'
+}
+
+# Low-cardinality text columns, stored as small integer codes plus a
+# dictionary of their few distinct values instead of one string per row
+CATEGORY_DTYPES = {
+    'warehouse_block': 'category',
+    'mode_of_shipment': 'category',
+    'product_importance': 'category',
+    'gender': 'category'
+}
+
+# Values used to fill missing counts
+FILL_VALUES = {
+    'customer_care_calls': 0,
+    'prior_purchases': 0,
+    'discount_offered': 0
+}
+
+# SQL of the load paths, built once from COLS; rows are sent in COLS order
+_COLUMN_LIST = ','.join(COLS)
+_UPDATE_SET = ','.join([f"{col}=EXCLUDED.{col}" for col in COLS if col != 'id'])
+
+_CREATE_STAGE_SQL = """
+CREATE TEMP TABLE shipments_stage
+(LIKE warehouse.shipments INCLUDING DEFAULTS)
+ON COMMIT DROP;
+"""
+
+_COPY_STAGE_SQL = f"""
+COPY shipments_stage ({_COLUMN_LIST})
+FROM STDIN WITH (FORMAT BINARY)
+"""
+
+_COPY_TABLE_SQL = f"""
+COPY warehouse.shipments ({_COLUMN_LIST})
+FROM STDIN WITH (FORMAT BINARY)
+"""
+
+# Dropped right after the merge, as one transaction may stage several chunks
+_DROP_STAGE_SQL = "DROP TABLE shipments_stage;"
+
+_MERGE_SQL = f"""
+INSERT INTO warehouse.shipments ({_COLUMN_LIST})
+SELECT {_COLUMN_LIST} FROM shipments_stage
+ON CONFLICT (id) DO UPDATE
+SET {_UPDATE_SET};
+"""
+
+# Same merge for a stage that may hold an id more than once (arrow engine),
+# keeping the row ingested last
+_MERGE_DISTINCT_SQL = f"""
+INSERT INTO warehouse.shipments ({_COLUMN_LIST})
+SELECT DISTINCT ON (id) {_COLUMN_LIST} FROM shipments_stage
+ORDER BY id, ctid DESC
+ON CONFLICT (id) DO UPDATE
+SET {_UPDATE_SET};
+"""
+
+_INSERT_SQL = f"""
+INSERT INTO warehouse.shipments ({_COLUMN_LIST})
+VALUES %s
+ON CONFLICT (id) DO UPDATE
+SET {_UPDATE_SET};
+"""
+
+_PREPARE_SQL = f"""
+PREPARE ins_shipment (
+    int, varchar, varchar, int, int, int, int, varchar, varchar, int, int, int
+) AS
+INSERT INTO warehouse.shipments ({_COLUMN_LIST})
+VALUES ({','.join([f"${i}" for i in range(1, len(COLS) + 1)])})
+ON CONFLICT (id) DO UPDATE
+SET {_UPDATE_SET};
+"""
+
+_EXECUTE_SQL = f"EXECUTE ins_shipment ({','.join(['%s'] * len(COLS))})"
+
+def get_connection():
+    """Create admin connection to the default 'postgres' database with error handling"""
     try:
-        if database == 'postgres':
-            conn = psycopg2.connect(
-                dbname='postgres',
-                user=DB_CONFIG['user'],
-                password=DB_CONFIG['password'],
-                host=DB_CONFIG['host']
-            )
-        else:
-            conn = psycopg2.connect(**DB_CONFIG)
+        conn = psycopg2.connect(
+            dbname='postgres',
+            user=DB_CONFIG['user'],
+            password=DB_CONFIG['password'],
+            host=DB_CONFIG['host']
+        )
         return conn
     except psycopg2.Error as e:
         logging.error(f"Database connection failed: {str(e)}")
         raise
 
+# Connection pools to the target database, keyed by process id. A forked
+# worker inherits its parent's pool, whose sockets it must neither use nor
+# close, so it keeps that entry untouched and builds its own.
+_POOLS = {}
+
+def get_pool():
+    """Return this process's connection pool to the target database"""
+    pid = os.getpid()
+    if pid not in _POOLS:
+        try:
+            _POOLS[pid] = ThreadedConnectionPool(
+                minconn=1, maxconn=POOL_MAX_CONNECTIONS, **DB_CONFIG
+            )
+        except psycopg2.Error as e:
+            logging.error(f"Database connection failed: {str(e)}")
+            raise
+    return _POOLS[pid]
+
+@contextmanager
+def pooled_connection():
+    """Borrow a connection to the target database from the pool"""
+    pool = get_pool()
+    conn = pool.getconn()
+    try:
+        yield conn
+    finally:
+        # Discard connections that were closed, e.g. after a server restart
+        pool.putconn(conn, close=bool(conn.closed))
+
+def close_pool():
+    """Close every connection in this process's pool"""
+    pool = _POOLS.pop(os.getpid(), None)
+    if pool is not None:
+        pool.closeall()
+
 def create_database():
     """Create the database if it doesn't exist"""
     try:
@@ -71,183 +276,502 @@ def create_database():
         cur.close()
         conn.close()
 
-def create_schema():
+def create_schema(conn):
     """Create the schema if it doesn't exist"""
     try:
-        conn = get_connection(DB_CONFIG['dbname'])
-        cur = conn.cursor()
-        
-        cur.execute("""
-        CREATE SCHEMA IF NOT EXISTS warehouse;
-        """)
-        conn.commit()
+        with conn, conn.cursor() as cur:
+            cur.execute("""
+            CREATE SCHEMA IF NOT EXISTS warehouse;
+            """)
         logging.info("Schema 'warehouse' created successfully")
         
     except Exception as e:
         logging.error(f"Error in create_schema: {str(e)}")
         raise
-    finally:
-        cur.close()
-        conn.close()
 
-def create_table():
-    """Create the shipments table with appropriate data types"""
+def create_table(conn):
+    """Create the shipments table and return whether it needs a bulk load"""
     try:
-        conn = get_connection(DB_CONFIG['dbname'])
-        cur = conn.cursor()
-        
+        # The primary key and CHECK constraints are left out so the initial
+        # load does not maintain them row by row; add_constraints() applies
+        # them once the data is in
         create_table_query = """
         CREATE TABLE IF NOT EXISTS warehouse.shipments (
-            id INTEGER PRIMARY KEY,
+            id INTEGER NOT NULL,
             warehouse_block VARCHAR(50),
             mode_of_shipment VARCHAR(50),
             customer_care_calls INTEGER,
-            customer_rating INTEGER CHECK (customer_rating BETWEEN 1 AND 5),
+            customer_rating INTEGER,
             cost_of_the_product INTEGER,
             prior_purchases INTEGER,
             product_importance VARCHAR(50),
             gender VARCHAR(50),
             discount_offered INTEGER,
             weight_in_gms INTEGER,
-            reached_on_time INTEGER CHECK (reached_on_time IN (0, 1)),
+            reached_on_time INTEGER,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         );
         """
         
-        cur.execute(create_table_query)
-        conn.commit()
+        with conn, conn.cursor() as cur:
+            cur.execute(create_table_query)
+            
+            # A table without primary key is new or left by an interrupted bulk load
+            cur.execute("""
+            SELECT 1 FROM pg_constraint
+            WHERE conrelid = 'warehouse.shipments'::regclass AND contype = 'p';
+            """)
+            bulk = cur.fetchone() is None
         logging.info("Table 'shipments' created successfully")
+        return bulk
         
     except Exception as e:
         logging.error(f"Error in create_table: {str(e)}")
         raise
-    finally:
-        cur.close()
-        conn.close()
+
+def _add_constraints(cur):
+    """Add the primary key and CHECK constraints within the current transaction"""
+    # Without a primary key the bulk load may have appended an id more
+    # than once; keep the row that was loaded last
+    cur.execute("""
+    DELETE FROM warehouse.shipments a
+    USING warehouse.shipments b
+    WHERE a.id = b.id AND a.ctid < b.ctid;
+    """)
+    
+    # Build the index in one sorted pass and validate both checks in
+    # the same table scan
+    cur.execute("""
+    ALTER TABLE warehouse.shipments
+        ADD CONSTRAINT shipments_pkey PRIMARY KEY (id),
+        ADD CONSTRAINT shipments_customer_rating_check
+            CHECK (customer_rating BETWEEN 1 AND 5),
+        ADD CONSTRAINT shipments_reached_on_time_check
+            CHECK (reached_on_time IN (0, 1));
+    """)
+
+def add_constraints(conn):
+    """Add the primary key and CHECK constraints after a bulk load"""
+    try:
+        with conn, conn.cursor() as cur:
+            _add_constraints(cur)
+        logging.info("Constraints on 'shipments' added successfully")
+        
+    except Exception as e:
+        logging.error(f"Error in add_constraints: {str(e)}")
+        raise
+
+def validate_header(path):
+    """Validate that the CSV header lists the expected columns in order"""
+    # The readers assign COLS by position, so a missing or reordered column
+    # would otherwise load silently into the wrong table column
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        header = next(csv.reader(f), [])
+    
+    assert header == SOURCE_COLS, f"Unexpected CSV columns: {header}"
+    
+    return True
 
 def validate_data(df):
     """Validate data before transformation"""
-    assert all(col in df.columns for col in [
-        'ID', 'Warehouse_block', 'Mode_of_Shipment', 'Customer_care_calls',
-        'Customer_rating', 'Cost_of_the_Product', 'Prior_purchases',
-        'Product_importance', 'Gender', 'Discount_offered', 'Weight_in_gms',
-        'Reached.on.Time_Y.N'
-    ]), "Missing required columns"
+    assert all(col in df.columns for col in COLS), "Missing required columns"
+    
+    # Every row needs an id to satisfy the primary key added after a bulk load
+    assert not df['id'].isna().any(), "Missing ids"
     
-    assert df['Customer_rating'].between(1, 5).all(), "Invalid customer ratings"
-    assert df['Reached.on.Time_Y.N'].isin([0, 1]).all(), "Invalid reached on time values"
+    # Compare the raw buffers; missing values become NaN and fail the checks
+    rating = df['customer_rating'].to_numpy(dtype='float64', na_value=np.nan)
+    assert len(rating) == 0 or (rating.min() >= 1 and rating.max() <= 5), "Invalid customer ratings"
+    
+    reached = df['reached_on_time'].to_numpy(dtype='float64', na_value=np.nan)
+    assert ((reached == 0) | (reached == 1)).all(), "Invalid reached on time values"
     
     return True
 
 def transform_data(df):
-    """Transform the data before loading into PostgreSQL"""
+    """Transform the data in place before loading into PostgreSQL (mutates df)"""
     try:
+        # Columns are normally renamed and typed by read_csv (see COLS and
+        # DTYPES); only coerce numeric columns that arrive with another dtype
+        for col, dtype in DTYPES.items():
+            if col in df.columns and not pd.api.types.is_integer_dtype(df[col]):
+                values = pd.to_numeric(df[col], errors='coerce')
+                
+                # Casting to a nullable integer raises on fractional or
+                # out-of-range values, so report them as invalid data instead
+                bounds = np.iinfo(pd.api.types.pandas_dtype(dtype).numpy_dtype)
+                present = values.dropna()
+                assert ((present % 1 == 0) & present.between(bounds.min, bounds.max)).all(), \
+                    f"Invalid {col} values"
+                
+                df[col] = values.astype(dtype)
+        
         # Validate data first
         validate_data(df)
         
-        # Create a copy to avoid modifying the original dataframe
-        df_transformed = df.copy()
-        
-        # Rename columns to match PostgreSQL naming conventions
-        column_mapping = {
-            'ID': 'id',
-            'Warehouse_block': 'warehouse_block',
-            'Mode_of_Shipment': 'mode_of_shipment',
-            'Customer_care_calls': 'customer_care_calls',
-            'Customer_rating': 'customer_rating',
-            'Cost_of_the_Product': 'cost_of_the_product',
-            'Prior_purchases': 'prior_purchases',
-            'Product_importance': 'product_importance',
-            'Gender': 'gender',
-            'Discount_offered': 'discount_offered',
-            'Weight_in_gms': 'weight_in_gms',
-            'Reached.on.Time_Y.N': 'reached_on_time'
-        }
-        df_transformed.rename(columns=column_mapping, inplace=True)
-        
-        # Ensure numeric columns are of the correct type
-        numeric_columns = [
-            'customer_care_calls', 'customer_rating', 'cost_of_the_product',
-            'prior_purchases', 'discount_offered', 'weight_in_gms', 
-            'reached_on_time'
-        ]
-        
-        for col in numeric_columns:
-            df_transformed[col] = pd.to_numeric(df_transformed[col], errors='coerce')
-            
-        # Fill any NaN values
-        df_transformed = df_transformed.fillna({
-            'customer_care_calls': 0,
-            'prior_purchases': 0,
-            'discount_offered': 0
-        })
+        # Fill any NaN values in place; only the filled columns are touched
+        df.fillna(FILL_VALUES, inplace=True)
         
-        logging.info("Data transformation completed successfully")
-        return df_transformed
+        logging.info(f"Transformed {len(df)} records successfully")
+        return df
         
     except Exception as e:
         logging.error(f"Error in transform_data: {str(e)}")
         raise
 
-def load_data(df):
+# Framing of PostgreSQL's binary COPY format: signature, flags and header
+# extension length up front, then per row a field count and per field a
+# length (-1 for NULL) followed by the value in network byte order
+PGCOPY_HEADER = b'PGCOPY\n\xff\r\n\x00' + struct.pack('>ii', 0, 0)
+PGCOPY_TRAILER = struct.pack('>h', -1)
+_FIELD_COUNT = struct.Struct('>h')
+_FIELD_LENGTH = struct.Struct('>i')
+_INT4_FIELD = struct.Struct('>ii')
+_NULL_FIELD = _FIELD_LENGTH.pack(-1)
+
+def _encode_text_field(value):
+    """Encode a VARCHAR value as a binary COPY field of its UTF-8 text"""
+    data = str(value).encode('utf-8')
+    return _FIELD_LENGTH.pack(len(data)) + data
+
+def _encode_binary_column(series):
+    """Encode one column as a list of binary COPY fields"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Encode each category once and look the fields up by code; the
+        # code of a missing value is -1, which picks the trailing NULL field
+        encoded = [_encode_text_field(value) for value in series.cat.categories]
+        encoded.append(_NULL_FIELD)
+        return [encoded[code] for code in series.cat.codes.tolist()]
+    
+    mask = series.isna().to_numpy()
+    
+    if pd.api.types.is_integer_dtype(series.dtype):
+        # INTEGER columns are sent as 4-byte big-endian values
+        values = series.to_numpy(dtype='int64', na_value=0).tolist()
+        return [
+            _NULL_FIELD if is_null else _INT4_FIELD.pack(4, value)
+            for value, is_null in zip(values, mask)
+        ]
+    
+    # Other VARCHAR columns are sent as their UTF-8 text
+    return [
+        _NULL_FIELD if is_null else _encode_text_field(value)
+        for value, is_null in zip(series.tolist(), mask)
+    ]
+
+def to_pgcopy_binary(df):
+    """Serialise a DataFrame into a buffer in PostgreSQL's binary COPY format"""
+    fields = [_encode_binary_column(df[col]) for col in df.columns]
+    row_header = _FIELD_COUNT.pack(len(df.columns))
+    
+    buf = io.BytesIO()
+    buf.write(PGCOPY_HEADER)
+    buf.write(b''.join(chain.from_iterable(zip(repeat(row_header), *fields))))
+    buf.write(PGCOPY_TRAILER)
+    buf.seek(0)
+    return buf
+
+def _copy_merge(cur, df):
+    """Stream the rows with COPY into a staging table and merge them"""
+    # Stage the DataFrame in memory in binary COPY format, so the server
+    # does not have to parse integers from text
+    buf = to_pgcopy_binary(df)
+    
+    # COPY into a temporary staging table, then merge into the target
+    # table so existing rows are still updated on conflict
+    cur.execute(_CREATE_STAGE_SQL)
+    cur.copy_expert(_COPY_STAGE_SQL, buf)
+    cur.execute(_MERGE_SQL)
+    cur.execute(_DROP_STAGE_SQL)
+
+def _copy_append(cur, df):
+    """Stream the rows with COPY straight into the target table"""
+    cur.copy_expert(_COPY_TABLE_SQL, to_pgcopy_binary(df))
+
+def _table_has_rows(cur):
+    """Check whether the target table holds any row yet"""
+    cur.execute("SELECT EXISTS (SELECT 1 FROM warehouse.shipments);")
+    return cur.fetchone()[0]
+
+def _copy_append_or_merge(cur, df):
+    """Append the rows with COPY, merging them if any id already exists"""
+    # Another worker may have loaded overlapping ids since the table was
+    # found empty; the savepoint lets the merge run in the same transaction
+    cur.execute("SAVEPOINT copy_append;")
+    try:
+        _copy_append(cur, df)
+    except UniqueViolation:
+        cur.execute("ROLLBACK TO SAVEPOINT copy_append;")
+        _copy_merge(cur, df)
+
+def _insert_values(cur, df):
+    """Upsert the rows with multi-row INSERT statements"""
+    # Stream plain tuples straight from the columns; unlike df.values this
+    # does not upcast the whole frame to a single object array first
+    records = df.itertuples(index=False, name=None)
+    
+    execute_values(cur, _INSERT_SQL, records, template=None, page_size=VALUES_PAGE_SIZE)
+
+def _insert_prepared(cur, df):
+    """Upsert the rows through a server-side prepared INSERT statement"""
+    # Prepared statements live for the whole session, so parse it only once
+    # per connection
+    cur.execute("SELECT 1 FROM pg_prepared_statements WHERE name = 'ins_shipment'")
+    if cur.fetchone() is None:
+        cur.execute(_PREPARE_SQL)
+    
+    records = df.itertuples(index=False, name=None)
+    
+    execute_batch(cur, _EXECUTE_SQL, records, page_size=VALUES_PAGE_SIZE)
+
+def _configure_load_session(cur):
+    """Relax durability settings for the current load transaction"""
+    # SET LOCAL only lasts until the transaction ends; without waiting for
+    # the WAL flush a crash can lose the last commits, but never corrupts data.
+    # One statement per call, as ADBC rejects several commands in one string
+    cur.execute("SET LOCAL synchronous_commit TO OFF")
+    cur.execute("SET LOCAL statement_timeout = 0")
+
+def _load_rows(cur, df, bulk):
+    """Load transformed rows within the current transaction and return their count"""
+    # Keep the last occurrence of each id, as a single INSERT ... ON CONFLICT
+    # statement cannot update the same row twice
+    unique_ids = df['id'].is_unique
+    if not unique_ids:
+        df = df.drop_duplicates(subset='id', keep='last')
+    
+    # Without a primary key there is nothing to conflict with, so a
+    # bulk load appends with COPY whatever the load method
+    if bulk:
+        _copy_append(cur, df)
+    elif LOAD_METHOD == 'copy' and unique_ids and not _table_has_rows(cur):
+        _copy_append_or_merge(cur, df)
+    elif LOAD_METHOD == 'copy':
+        _copy_merge(cur, df)
+    elif LOAD_METHOD == 'values':
+        _insert_values(cur, df)
+    elif LOAD_METHOD == 'prepared':
+        _insert_prepared(cur, df)
+    else:
+        raise ValueError(f"Unknown load method: {LOAD_METHOD}")
+    
+    return len(df)
+
+def load_data(conn, df, bulk=False):
     """Load the transformed data into PostgreSQL"""
     try:
-        conn = get_connection(DB_CONFIG['dbname'])
-        cur = conn.cursor()
+        # The connection context commits on success and rolls back on error
+        with conn, conn.cursor() as cur:
+            _configure_load_session(cur)
+            loaded = _load_rows(cur, df, bulk)
         
-        # Get column names
-        columns = list(df.columns)
+        logging.info(f"Successfully loaded {loaded} records into the database")
         
-        # Prepare the INSERT query
-        values_placeholder = ','.join(['%s'] * len(columns))
+    except Exception as e:
+        logging.error(f"Error in load_data: {str(e)}")
+        raise
+
+def load_serial(conn, reader, bulk=False):
+    """Transform and load every chunk of a CSV reader in a single transaction"""
+    try:
+        # A failing chunk rolls back every chunk before it, and in bulk mode
+        # the constraints are added before the one commit
+        with conn, conn.cursor() as cur:
+            _configure_load_session(cur)
+            
+            loaded = 0
+            for chunk in reader:
+                logging.info(f"Extracted {len(chunk)} records from CSV")
+                
+                # Transform: Clean and prepare the chunk in place
+                transform_data(chunk)
+                
+                # Load: Insert data into PostgreSQL
+                loaded += _load_rows(cur, chunk, bulk)
+            
+            if bulk:
+                _add_constraints(cur)
         
-        insert_query = f"""
-        INSERT INTO warehouse.shipments ({','.join(columns)})
-        VALUES ({values_placeholder})
-        ON CONFLICT (id) DO UPDATE
-        SET {','.join([f"{col}=EXCLUDED.{col}" for col in columns if col != 'id'])};
-        """
+        logging.info(f"Successfully loaded {loaded} records into the database")
         
-        # Convert DataFrame to list of tuples for insertion
-        records = df.values.tolist()
+    except Exception as e:
+        logging.error(f"Error in load_serial: {str(e)}")
+        raise
+
+def _init_worker(log_queue):
+    """Send the worker's log records to the parent and close its pool on exit"""
+    # A forked worker inherits the parent's handlers and their unflushed
+    # buffer, a spawned one sets up its own log file on import; drop both so
+    # only the parent writes the log
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, MemoryHandler):
+            with handler.lock:
+                handler.buffer.clear()
+        root.removeHandler(handler)
+    root.addHandler(QueueHandler(log_queue))
+    
+    # Pool workers exit through multiprocessing, which runs its finalizers
+    # but not atexit hooks
+    Finalize(None, close_pool, exitpriority=10)
+
+def _load_chunk(chunk, bulk):
+    """Transform and load one chunk on a connection owned by the worker"""
+    # The pooled connection is reused by the next chunk this worker gets
+    with pooled_connection() as conn:
+        load_data(conn, transform_data(chunk), bulk)
+
+def load_parallel(reader, bulk=False):
+    """Transform and load the chunks of a CSV reader across worker processes"""
+    # Workers log through a queue that the parent drains into its own
+    # handlers, whatever start method the platform uses for the workers
+    ctx = multiprocessing.get_context()
+    log_queue = ctx.Queue()
+    listener = QueueListener(
+        log_queue, *logging.getLogger().handlers, respect_handler_level=True
+    )
+    listener.start()
+    try:
+        with ProcessPoolExecutor(
+            max_workers=ETL_WORKERS,
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(log_queue,)
+        ) as pool:
+            pending = set()
+            for chunk in reader:
+                logging.info(f"Extracted {len(chunk)} records from CSV")
+                pending.add(pool.submit(_load_chunk, chunk, bulk))
+                
+                # Bound the number of chunks held in memory while workers are busy
+                if len(pending) >= 2 * ETL_WORKERS:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()
+            
+            for future in pending:
+                future.result()
+    finally:
+        listener.stop()
+
+def get_adbc_uri():
+    """Build the PostgreSQL URI used by the ADBC driver"""
+    return (
+        f"postgresql://{quote(DB_CONFIG['user'], safe='')}:"
+        f"{quote(DB_CONFIG['password'], safe='')}@"
+        f"{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['dbname']}"
+    )
+
+def load_arrow(path, bulk=False):
+    """Extract, transform and load the CSV with PyArrow and ADBC"""
+    if pa is None:
+        raise ImportError("The arrow engine requires pyarrow and adbc-driver-postgresql")
+    
+    try:
+        # Extract: parse straight into columnar buffers, renaming the columns
+        # and typing them as INTEGER-compatible int32 on the way
+        table = pacsv.read_csv(
+            path,
+            read_options=pacsv.ReadOptions(column_names=COLS, skip_rows=1),
+            convert_options=pacsv.ConvertOptions(
+                column_types={col: pa.int32() for col in DTYPES},
+                # Read empty text fields as NULL, like the pandas engine
+                strings_can_be_null=True
+            )
+        )
+        logging.info(f"Extracted {table.num_rows} records from CSV")
+        
+        # Transform: validate and fill missing counts; min_max skips nulls,
+        # so reject missing values separately as validate_data does
+        assert table['id'].null_count == 0, "Missing ids"
+        if table.num_rows > 0:
+            assert table['customer_rating'].null_count == 0, "Invalid customer ratings"
+            rating = pc.min_max(table['customer_rating'])
+            assert rating['min'].as_py() >= 1 and rating['max'].as_py() <= 5, "Invalid customer ratings"
+            
+            assert table['reached_on_time'].null_count == 0, "Invalid reached on time values"
+            reached = pc.min_max(table['reached_on_time'])
+            assert reached['min'].as_py() >= 0 and reached['max'].as_py() <= 1, "Invalid reached on time values"
         
-        # Execute batch insert
-        cur.executemany(insert_query, records)
-        conn.commit()
+        for col, value in FILL_VALUES.items():
+            table = table.set_column(
+                COLS.index(col), col, pc.fill_null(table[col], value)
+            )
+        
+        # Load: in bulk mode append straight to the table, otherwise ingest
+        # into a temporary staging table with binary COPY, then merge keeping
+        # the last occurrence of each id from the file
+        with adbc_pg.connect(get_adbc_uri()) as conn:
+            with conn.cursor() as cur:
+                _configure_load_session(cur)
+            if bulk:
+                conn.adbc_ingest(
+                    'shipments', table, mode='append', db_schema_name='warehouse'
+                )
+            else:
+                conn.adbc_ingest('shipments_stage', table, mode='create', temporary=True)
+                with conn.cursor() as cur:
+                    cur.execute(_MERGE_DISTINCT_SQL)
+            conn.commit()
         
-        logging.info(f"Successfully loaded {len(records)} records into the database")
+        logging.info(f"Successfully loaded {table.num_rows} records into the database")
         
     except Exception as e:
-        conn.rollback()
-        logging.error(f"Error in load_data: {str(e)}")
+        logging.error(f"Error in load_arrow: {str(e)}")
         raise
-    finally:
-        cur.close()
-        conn.close()
 
 def main():
     """Main ETL process"""
     try:
-        # Create database, schema, and table
+        # Create the database using the admin connection
         create_database()
-        create_schema()
-        create_table()
-        
-        # Extract: Read the CSV file
-        df = pd.read_csv('shipments.csv')
-        logging.info("Data extracted from CSV successfully")
-        
-        # Transform: Clean and prepare the data
-        df_transformed = transform_data(df)
         
-        # Load: Insert data into PostgreSQL
-        load_data(df_transformed)
+        # Reuse a single pooled connection for the remaining steps
+        with pooled_connection() as conn:
+            # Create schema and table
+            create_schema(conn)
+            bulk = create_table(conn)
+            
+            # The CSV header is replaced by COLS when parsing, so check it first
+            validate_header('shipments.csv')
+            
+            if ETL_ENGINE == 'arrow':
+                load_arrow('shipments.csv', bulk)
+                
+                # Enforce the primary key and CHECK constraints once the bulk load is done
+                if bulk:
+                    add_constraints(conn)
+            elif ETL_ENGINE == 'pandas':
+                # Extract: Read the CSV file in chunks to bound memory usage
+                reader = pd.read_csv(
+                    'shipments.csv',
+                    header=0,
+                    names=COLS,
+                    dtype={**DTYPES, **CATEGORY_DTYPES},
+                    chunksize=CHUNK_SIZE
+                )
+                
+                if ETL_WORKERS > 1:
+                    # Transform and load independent chunks in parallel, each
+                    # committed by its worker
+                    load_parallel(reader, bulk)
+                    
+                    if bulk:
+                        add_constraints(conn)
+                else:
+                    # Transform and load all chunks in one transaction, which
+                    # also adds the constraints after a bulk load
+                    load_serial(conn, reader, bulk)
+            else:
+                raise ValueError(f"Unknown ETL engine: {ETL_ENGINE}")
         
         logging.info("ETL process completed successfully")
         
     except Exception as e:
         logging.error(f"ETL process failed: {str(e)}")
         raise
+    finally:
+        close_pool()
 
 if __name__ == "__main__":
     main()